@@ -1,14 +1,86 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import folium
+from folium.plugins import FastMarkerCluster
 import os
 import logging
+from datetime import datetime
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Por encima de este número de epicentros se agrupan en clusters para que el
+# HTML del mapa siga siendo manejable por el navegador
+MAX_MARCADORES_INDIVIDUALES = 5000
+
+# Máximo de puntos dibujados en la dispersión profundidad vs magnitud; con
+# más puntos el gráfico ya está saturado y solo se encarece el renderizado
+MAX_PUNTOS_DISPERSION = 5000
+
+# Columnas del catálogo que usan el preprocesamiento y las visualizaciones;
+# el resto (net, id, updated, status, ...) no se carga en memoria
+COLUMNAS_UTILIZADAS = ['time', 'latitude', 'longitude', 'depth', 'mag', 'magType', 'place']
+
+def agregar_epicentros(mapa, df):
+    """
+    Agrega los epicentros del DataFrame al mapa de folium.
+    Hasta MAX_MARCADORES_INDIVIDUALES puntos se dibujan como una sola capa
+    GeoJSON de círculos; por encima se usa FastMarkerCluster.
+    """
+    coords = df[['latitude', 'longitude']].dropna().to_numpy()
+    if len(coords) > MAX_MARCADORES_INDIVIDUALES:
+        FastMarkerCluster(coords.tolist()).add_to(mapa)
+        return mapa
+
+    features = [
+        {"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [lon, lat]}}
+        for lat, lon in coords.tolist()
+    ]
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        marker=folium.CircleMarker(radius=2, color='red', fill=True, fill_opacity=0.6)
+    ).add_to(mapa)
+    return mapa
+
+def histograma_suavizado(valores, bins=30, sigma=1.5):
+    """
+    Calcula el histograma de los valores y una curva suavizada de los conteos
+    (convolución con un kernel gaussiano de sigma bins), que reemplaza a la
+    KDE de seaborn sin evaluarla sobre todos los puntos.
+    Retorna (bordes, conteos, curva).
+    """
+    conteos, bordes = np.histogram(valores, bins=bins)
+    radio = int(np.ceil(3 * sigma))
+    x = np.arange(-radio, radio + 1)
+    kernel = np.exp(-0.5 * (x / sigma) ** 2)
+    curva = np.convolve(conteos, kernel / kernel.sum(), mode='same')
+    return bordes, conteos, curva
+
+def buscar_archivo_csv():
+    """
+    Busca un archivo CSV en el directorio actual y luego en 'data/'.
+    Retorna la ruta del primero encontrado.
+    """
+    archivos_csv = [f for f in os.listdir('.') if f.endswith('.csv')]
+    if archivos_csv:
+        ruta_archivo = archivos_csv[0]
+        logger.info(f"Usando archivo encontrado: {ruta_archivo}")
+        return ruta_archivo
+
+    # Buscar en la subcarpeta 'data/'
+    data_dir = os.path.join('.', 'data')
+    if os.path.isdir(data_dir):
+        archivos_csv_data = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
+        if archivos_csv_data:
+            ruta_archivo = os.path.join(data_dir, archivos_csv_data[0])
+            logger.info(f"Usando archivo encontrado en 'data/': {ruta_archivo}")
+            return ruta_archivo
+
+    raise FileNotFoundError("No se encontró ningún archivo CSV en el directorio actual ni en 'data/'")
+
 def cargar_datos(ruta_archivo=None):
     """
     Carga los datos del archivo CSV.
@@ -16,26 +88,14 @@ def cargar_datos(ruta_archivo=None):
     """
     try:
         if ruta_archivo is None:
-            # Buscar el archivo en el directorio actual
-            archivos_csv = [f for f in os.listdir('.') if f.endswith('.csv')]
-            if archivos_csv:
-                ruta_archivo = archivos_csv[0]
-                logger.info(f"Usando archivo encontrado: {ruta_archivo}")
-            else:
-                # Buscar en la subcarpeta 'data/'
-                data_dir = os.path.join('.', 'data')
-                if os.path.isdir(data_dir):
-                    archivos_csv_data = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
-                    if archivos_csv_data:
-                        ruta_archivo = os.path.join(data_dir, archivos_csv_data[0])
-                        logger.info(f"Usando archivo encontrado en 'data/': {ruta_archivo}")
-                    else:
-                        raise FileNotFoundError("No se encontró ningún archivo CSV en el directorio actual ni en 'data/'")
-                else:
-                    raise FileNotFoundError("No se encontró ningún archivo CSV en el directorio actual ni en 'data/'")
+            ruta_archivo = buscar_archivo_csv()
 
         # Leer el CSV
-        df = pd.read_csv(ruta_archivo)
+        df = pd.read_csv(
+            ruta_archivo,
+            usecols=lambda col: col in COLUMNAS_UTILIZADAS,
+            dtype={'magType': 'category', 'place': 'category'}
+        )
         logger.info(f"Datos cargados exitosamente desde {ruta_archivo}")
         return df
     except Exception as e:
@@ -50,8 +110,10 @@ def generar_visualizaciones(df):
     # ================================
     # 1. DISTRIBUCIÓN DE MAGNITUDES
     # ================================
+    bordes, conteos, curva = histograma_suavizado(df['mag'].dropna().to_numpy(), bins=30)
     plt.figure(figsize=(10,5))
-    sns.histplot(df['mag'].dropna(), bins=30, kde=True)
+    plt.bar(bordes[:-1], conteos, width=np.diff(bordes), align='edge', edgecolor='black')
+    plt.plot((bordes[:-1] + bordes[1:]) / 2, curva)
     plt.title("Distribución de magnitudes sísmicas")
     plt.xlabel("Magnitud")
     plt.ylabel("Frecuencia")
@@ -62,9 +124,10 @@ def generar_visualizaciones(df):
     # 2. SISMOS POR MES
     # ================================
     if 'time' in df.columns:
-        df['month'] = df['time'].dt.to_period('M')
+        sismos_mes = df.set_index('time').resample('MS').size()
+        sismos_mes.index = sismos_mes.index.strftime('%Y-%m')
         plt.figure(figsize=(14,6))
-        df['month'].value_counts().sort_index().plot(kind='bar')
+        sismos_mes.plot(kind='bar')
         plt.title("Cantidad de sismos por mes")
         plt.xlabel("Mes")
         plt.ylabel("Número de sismos")
@@ -80,14 +143,7 @@ def generar_visualizaciones(df):
         map_center = [df['latitude'].mean(), df['longitude'].mean()]
         mapa = folium.Map(location=map_center, zoom_start=5)
 
-        for _, row in df.iterrows():
-            folium.CircleMarker(
-                location=[row['latitude'], row['longitude']],
-                radius=2,
-                color='red',
-                fill=True,
-                fill_opacity=0.6
-            ).add_to(mapa)
+        agregar_epicentros(mapa, df)
 
         mapa.save("mapa_sismos.html")
         print("🌍 Mapa guardado como mapa_sismos.html")
@@ -96,8 +152,9 @@ def generar_visualizaciones(df):
     # 4. PROFUNDIDAD VS MAGNITUD
     # ================================
     if 'depth' in df.columns and 'mag' in df.columns:
+        muestra = df.sample(MAX_PUNTOS_DISPERSION, random_state=0) if len(df) > MAX_PUNTOS_DISPERSION else df
         plt.figure(figsize=(8,6))
-        sns.scatterplot(data=df, x='depth', y='mag', alpha=0.5)
+        sns.scatterplot(data=muestra, x='depth', y='mag', alpha=0.5)
         plt.title("Relación entre profundidad y magnitud")
         plt.xlabel("Profundidad (km)")
         plt.ylabel("Magnitud")
@@ -137,15 +194,6 @@ def preprocesar_para_bayes(df):
     """
     Preprocesa los datos para el modelo bayesiano.
     """
-    import numpy as np
-    import pandas as pd
-    from datetime import datetime
-    import logging
-
-    # Configurar logging
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-
     try:
         # Validación de datos de entrada
         required_columns = ['mag', 'depth', 'time']
@@ -154,28 +202,20 @@ def preprocesar_para_bayes(df):
             raise ValueError(f"Columnas requeridas faltantes: {missing_columns}")
 
         # 1. magnitud_historica (mejorado)
-        def categorizar_magnitud(mag):
-            if pd.isna(mag):
-                return 'desconocida'
-            if mag < 4:
-                return 'baja'
-            elif 4 <= mag <= 6:
-                return 'media'
-            else:
-                return 'alta'
-        df['magnitud_historica'] = df['mag'].apply(categorizar_magnitud)
+        mag = df['mag'].to_numpy(dtype=float)
+        df['magnitud_historica'] = np.select(
+            [np.isnan(mag), mag < 4, mag <= 6],
+            ['desconocida', 'baja', 'media'],
+            default='alta'
+        )
 
         # 2. profundidad_sismica (mejorado)
-        def categorizar_profundidad(depth):
-            if pd.isna(depth):
-                return 'desconocida'
-            if depth < 70:
-                return 'superficial'
-            elif 70 <= depth <= 300:
-                return 'intermedia'
-            else:
-                return 'profunda'
-        df['profundidad_sismica'] = df['depth'].apply(categorizar_profundidad)
+        depth = df['depth'].to_numpy(dtype=float)
+        df['profundidad_sismica'] = np.select(
+            [np.isnan(depth), depth < 70, depth <= 300],
+            ['desconocida', 'superficial', 'intermedia'],
+            default='profunda'
+        )
 
         # 3. tiempo_ultimo_sismo (mejorado)
         if 'time' in df.columns:
@@ -241,8 +281,10 @@ def preprocesar_para_bayes(df):
 
         # 7. Nueva característica: frecuencia_mensual
         if 'time' in df.columns:
-            df['month'] = df['time'].dt.to_period('M')
-            freq_mensual = df.groupby('month').size().mean()
+            # Promedio de sismos por mes = sismos con fecha / meses distintos
+            meses = df['time'].values.astype('datetime64[M]')
+            meses = meses[~np.isnat(meses)]
+            freq_mensual = len(meses) / max(1, np.unique(meses).size)
             if freq_mensual < 5:
                 df['frecuencia_mensual'] = 'baja'
             elif freq_mensual < 20:
@@ -257,7 +299,8 @@ def preprocesar_para_bayes(df):
         if null_counts.any():
             logger.warning(f"Valores nulos encontrados: {null_counts[null_counts > 0]}")
 
-        # Devolver solo las columnas necesarias
+        # Devolver solo las columnas necesarias, como categorías (pocos
+        # valores distintos repetidos en todas las filas)
         return df[[
             'magnitud_historica',
             'profundidad_sismica',
@@ -266,8 +309,17 @@ def preprocesar_para_bayes(df):
             'patron_sismico',
             'intensidad_historica',
             'frecuencia_mensual'
-        ]]
+        ]].astype('category')
 
     except Exception as e:
         logger.error(f"Error en el preprocesamiento: {str(e)}")
         raise
+
+def preprocesar_para_bayes_soa(df):
+    """
+    Preprocesa los datos para el modelo bayesiano y devuelve un diccionario
+    {columna: array de estados} en lugar de un DataFrame, listo para
+    consultar_probabilidad_sismo_lote.
+    """
+    df_bayes = preprocesar_para_bayes(df)
+    return {col: df_bayes[col].to_numpy(dtype=str) for col in df_bayes.columns}
@@ -0,0 +1,115 @@
+# Tabla de probabilidad de probabilidad_sismo calculada solo con NumPy, sin
+# depender de pgmpy: permite consultar la red cuando todos los padres de
+# probabilidad_sismo están observados sin importar ni ejecutar pgmpy.
+import numpy as np
+
+# Base inicial de probabilidad
+prob_base = np.array([0.6, 0.3, 0.1])  # [baja, media, alta]
+
+# Factores de ajuste para cada variable
+factores = {
+    "magnitud": {"baja": [0.1, -0.05, -0.05], "media": [0, 0, 0], "alta": [-0.2, 0, 0.2], "desconocida": [0, 0, 0]},
+    "profundidad": {"superficial": [-0.1, 0, 0.1], "intermedia": [0, 0, 0], "profunda": [0.1, 0, -0.1], "desconocida": [0, 0, 0]},
+    "tiempo": {"reciente": [-0.1, 0, 0.1], "medio": [0, 0, 0], "lejano": [0.1, 0, -0.1], "desconocido": [0, 0, 0]},
+    "falla": {"baja": [0.1, 0, -0.1], "media": [0, 0, 0], "alta": [-0.15, 0, 0.15]},
+    "patron": {"esporádico": [0.1, 0, -0.1], "regular": [0, 0, 0], "frecuente": [-0.15, 0, 0.15], "desconocido": [0, 0, 0]},
+    "intensidad": {"baja": [0.1, 0, -0.1], "media": [0, 0, 0], "alta": [-0.15, 0, 0.15], "desconocida": [0, 0, 0]},
+    "frecuencia": {"baja": [0.1, 0, -0.1], "media": [0, 0, 0], "alta": [-0.15, 0, 0.15], "desconocida": [0, 0, 0]},
+}
+# Convertir los factores a arrays una sola vez para sumarlos directamente
+factores = {
+    nombre: {estado: np.asarray(valores, dtype=float) for estado, valores in tabla.items()}
+    for nombre, tabla in factores.items()
+}
+
+# Definir estados posibles
+magnitudes = ["baja", "media", "alta", "desconocida"]
+profundidades = ["superficial", "intermedia", "profunda", "desconocida"]
+tiempos = ["reciente", "medio", "lejano", "desconocido"]
+fallas = ["baja", "media", "alta"]
+patrones = ["esporádico", "regular", "frecuente", "desconocido"]
+intensidades = ["baja", "media", "alta", "desconocida"]
+frecuencias = ["baja", "media", "alta", "desconocida"]
+
+def construir_tabla_probabilidad():
+    """
+    Calcula la tabla completa de probabilidad_sismo por broadcasting: cada
+    variable aporta su tabla de factores (k_i, 3) sobre su propio eje, en el
+    mismo orden que product(magnitudes, profundidades, ...).
+    Retorna un array (4, 4, 4, 3, 4, 4, 4, 3) normalizado en el último eje.
+    """
+    variables_factor = [
+        ("magnitud", magnitudes),
+        ("profundidad", profundidades),
+        ("tiempo", tiempos),
+        ("falla", fallas),
+        ("patron", patrones),
+        ("intensidad", intensidades),
+        ("frecuencia", frecuencias),
+    ]
+    ajuste = np.zeros(3)
+    for eje, (nombre, estados) in enumerate(variables_factor):
+        forma = [1] * len(variables_factor) + [3]
+        forma[eje] = len(estados)
+        tabla = np.array([factores[nombre][estado] for estado in estados])
+        ajuste = ajuste + tabla.reshape(forma)
+
+    probs = np.clip(prob_base + ajuste, 0, 1)
+    probs /= probs.sum(axis=-1, keepdims=True)
+    return probs
+
+full_probs = construir_tabla_probabilidad()
+
+# Transponer para formato de pgmpy (TabularCPD en model.py)
+full_probs_transposed = full_probs.reshape(-1, 3).T
+
+# Padres de probabilidad_sismo en el orden de los ejes de full_probs, con
+# el índice de cada estado para consultar la tabla directamente
+padres_probabilidad = {
+    "magnitud_historica": magnitudes,
+    "profundidad_sismica": profundidades,
+    "tiempo_ultimo_sismo": tiempos,
+    "actividad_falla": fallas,
+    "patron_sismico": patrones,
+    "intensidad_historica": intensidades,
+    "frecuencia_mensual": frecuencias
+}
+indices_estado = {
+    var: {estado: i for i, estado in enumerate(estados)}
+    for var, estados in padres_probabilidad.items()
+}
+
+def _indices_tabla(evidencias):
+    """
+    Traduce los estados observados de cada padre a índices de full_probs.
+    Acepta un estado por padre (un registro) o un array de estados por padre
+    (un lote); en el segundo caso cada estado distinto se traduce una sola vez.
+    """
+    indices = []
+    for var in padres_probabilidad:
+        estados = evidencias[var]
+        if np.ndim(estados) == 0:
+            indices.append(indices_estado[var][estados])
+            continue
+        unicos, inversa = np.unique(np.asarray(estados), return_inverse=True)
+        codigos = np.array([indices_estado[var][estado] for estado in unicos], dtype=np.intp)
+        indices.append(codigos[inversa.ravel()])
+    return tuple(indices)
+
+def infer(evidencia):
+    """
+    Calcula la distribución de probabilidad_sismo para un único registro
+    con todos los padres observados.
+    Retorna un array (3,) con [prob_baja, prob_media, prob_alta].
+    """
+    return full_probs[_indices_tabla(evidencia)]
+
+def consultar_probabilidad_sismo_lote(evidencias):
+    """
+    Calcula la distribución de probabilidad_sismo para un lote de registros.
+    evidencias asocia cada padre de probabilidad_sismo con un array de estados
+    (uno por registro); como todos los padres están observados, el lote se
+    resuelve con un único indexado de full_probs.
+    Retorna un array (N, 3) con [prob_baja, prob_media, prob_alta] por registro.
+    """
+    return full_probs[_indices_tabla(evidencias)]
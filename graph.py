@@ -7,14 +7,18 @@
 
 # Importaciones necesarias
 import gradio as gr
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 import folium
 import os
-from data_cleaner import preprocesar_para_bayes, cargar_datos
-from model import inference
+from data_cleaner import cargar_datos as cargar_csv_sismos
+from data_cleaner import (preprocesar_para_bayes, agregar_epicentros,
+                          histograma_suavizado, MAX_PUNTOS_DISPERSION)
+from model import consultar_probabilidad_sismo
 import io
+from functools import lru_cache
 from PIL import Image
 
 # Configuración para generar gráficos sin interfaz GUI
@@ -25,18 +29,30 @@ matplotlib.use('Agg')
 # FUNCIONES DE CARGA Y PREPROCESAMIENTO
 # ============================================================================
 
+@lru_cache(maxsize=4)
+def _leer_csv(ruta, mtime, tamano):
+    """
+    Lee y convierte el CSV de sismos. La fecha de modificación y el tamaño
+    forman parte de la clave de caché para que un archivo modificado se
+    vuelva a leer.
+    """
+    df = cargar_csv_sismos(ruta)
+    if 'time' in df.columns:
+        df['time'] = pd.to_datetime(df['time'], errors='coerce')
+    return df
+
 def cargar_datos(archivo):
     """
     Carga y preprocesa los datos del archivo CSV de sismos.
+    Si el mismo archivo ya se cargó, se reutiliza el DataFrame en caché;
+    las funciones de análisis no deben modificarlo.
     Args:
         archivo: Archivo CSV con datos sísmicos
     Returns:
         DataFrame con los datos procesados
     """
-    df = pd.read_csv(archivo.name)
-    if 'time' in df.columns:
-        df['time'] = pd.to_datetime(df['time'], errors='coerce')
-    return df
+    ruta = archivo.name
+    return _leer_csv(ruta, os.path.getmtime(ruta), os.path.getsize(ruta))
 
 # ============================================================================
 # FUNCIONES DE ANÁLISIS Y VISUALIZACIÓN
@@ -48,15 +64,17 @@ def distribucion_magnitudes(df):
     Muestra la frecuencia de diferentes magnitudes para entender
     el patrón de actividad sísmica.
     """
-    plt.figure(figsize=(8,4))
-    sns.histplot(df['mag'].dropna(), bins=30, kde=True, color='skyblue', edgecolor='black')
-    plt.title("Distribución de magnitudes", fontsize=16)
-    plt.xlabel("Magnitud", fontsize=12)
-    plt.ylabel("Frecuencia", fontsize=12)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    fig = Figure(figsize=(8,4), layout='constrained')
+    ax = fig.subplots()
+    bordes, conteos, curva = histograma_suavizado(df['mag'].dropna().to_numpy(), bins=30)
+    ax.bar(bordes[:-1], conteos, width=np.diff(bordes), align='edge', color='skyblue', edgecolor='black')
+    ax.plot((bordes[:-1] + bordes[1:]) / 2, curva, color='steelblue')
+    ax.set_title("Distribución de magnitudes", fontsize=16)
+    ax.set_xlabel("Magnitud", fontsize=12)
+    ax.set_ylabel("Frecuencia", fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close()
+    fig.savefig(buf, format='png', dpi=100)
     buf.seek(0)
     return Image.open(buf)
 
@@ -69,39 +87,35 @@ def sismos_por_mes(df):
     if 'time' not in df.columns:
         return None
     
-    # Convertir a datetime si no lo es
-    df['time'] = pd.to_datetime(df['time'])
-    
-    # Agrupar por mes y año para reducir la saturación
-    df['month_year'] = df['time'].dt.to_period('M')
-    monthly_counts = df['month_year'].value_counts().sort_index()
+    # Agrupar por mes y año para reducir la saturación ('time' ya viene
+    # convertido a datetime desde cargar_datos)
+    meses = df['time'].values.astype('datetime64[M]')
+    meses = meses[~np.isnat(meses)]
+    etiquetas, conteos = np.unique(meses, return_counts=True)
     
     # Crear el gráfico con un tamaño más grande
-    plt.figure(figsize=(15, 6))
+    fig = Figure(figsize=(15, 6), layout='constrained')
+    ax = fig.subplots()
     
     # Usar un color más suave y agregar transparencia
-    bars = plt.bar(range(len(monthly_counts)), monthly_counts.values, 
+    bars = ax.bar(range(len(conteos)), conteos, 
                   color='lightgreen', alpha=0.7, edgecolor='black')
     
     # Configurar el eje x para mostrar solo algunos meses
-    plt.xticks(range(len(monthly_counts))[::3],  # Mostrar cada tercer mes
-              [str(x) for x in monthly_counts.index[::3]],  # Etiquetas
-              rotation=45)
+    ax.set_xticks(range(len(conteos))[::3],  # Mostrar cada tercer mes
+                  etiquetas[::3].astype(str),  # Etiquetas
+                  rotation=45)
     
-    plt.title("Sismos por mes", fontsize=16, pad=20)
-    plt.xlabel("Mes", fontsize=12, labelpad=10)
-    plt.ylabel("Cantidad de sismos", fontsize=12)
+    ax.set_title("Sismos por mes", fontsize=16, pad=20)
+    ax.set_xlabel("Mes", fontsize=12, labelpad=10)
+    ax.set_ylabel("Cantidad de sismos", fontsize=12)
     
     # Agregar una cuadrícula suave
-    plt.grid(True, linestyle='--', alpha=0.3)
-    
-    # Ajustar los márgenes
-    plt.tight_layout()
+    ax.grid(True, linestyle='--', alpha=0.3)
     
     # Guardar el gráfico
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight', dpi=300)
-    plt.close()
+    fig.savefig(buf, format='png', dpi=100)
     buf.seek(0)
     return Image.open(buf)
 
@@ -114,15 +128,7 @@ def mapa_epicentros(df):
         return None
 
     mapa = folium.Map(location=[df['latitude'].mean(), df['longitude'].mean()], zoom_start=5)
-    for _, row in df.iterrows():
-        if pd.notnull(row['latitude']) and pd.notnull(row['longitude']):
-            folium.CircleMarker(
-                location=[row['latitude'], row['longitude']],
-                radius=2,
-                color='red',
-                fill=True,
-                fill_opacity=0.6
-            ).add_to(mapa)
+    agregar_epicentros(mapa, df)
     return mapa
 
 def profundidad_vs_magnitud(df):
@@ -132,15 +138,16 @@ def profundidad_vs_magnitud(df):
     """
     if 'depth' not in df.columns or 'mag' not in df.columns:
         return None
-    plt.figure(figsize=(8,6))
-    sns.scatterplot(data=df, x='depth', y='mag', alpha=0.5, color='purple', edgecolor='black')
-    plt.title("Profundidad vs Magnitud", fontsize=16)
-    plt.xlabel("Profundidad (km)", fontsize=12)
-    plt.ylabel("Magnitud", fontsize=12)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    muestra = df.sample(MAX_PUNTOS_DISPERSION, random_state=0) if len(df) > MAX_PUNTOS_DISPERSION else df
+    fig = Figure(figsize=(8,6), layout='constrained')
+    ax = fig.subplots()
+    sns.scatterplot(data=muestra, x='depth', y='mag', alpha=0.5, color='purple', edgecolor='black', ax=ax)
+    ax.set_title("Profundidad vs Magnitud", fontsize=16)
+    ax.set_xlabel("Profundidad (km)", fontsize=12)
+    ax.set_ylabel("Magnitud", fontsize=12)
+    ax.grid(True, linestyle='--', alpha=0.7)
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close()
+    fig.savefig(buf, format='png', dpi=100)
     buf.seek(0)
     return Image.open(buf)
 
@@ -152,16 +159,16 @@ def zonas_sismicas(df):
     """
     if 'place' not in df.columns:
         return None
-    plt.figure(figsize=(10,5))
-    df['place'].value_counts().head(10).plot(kind='bar', color='lightblue', edgecolor='black')
-    plt.title("Top 10 zonas más sísmicas", fontsize=16)
-    plt.xlabel("Lugar", fontsize=12)
-    plt.ylabel("Cantidad", fontsize=12)
-    plt.xticks(rotation=45)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    fig = Figure(figsize=(10,5), layout='constrained')
+    ax = fig.subplots()
+    df['place'].value_counts().head(10).plot(kind='bar', color='lightblue', edgecolor='black', ax=ax)
+    ax.set_title("Top 10 zonas más sísmicas", fontsize=16)
+    ax.set_xlabel("Lugar", fontsize=12)
+    ax.set_ylabel("Cantidad", fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True, linestyle='--', alpha=0.7)
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close()
+    fig.savefig(buf, format='png', dpi=100)
     buf.seek(0)
     return Image.open(buf)
 
@@ -210,20 +217,20 @@ def predecir_sismo(magnitud, profundidad, tiempo, actividad, patron, intensidad,
     }
     
     # Realizar inferencia
-    resultado = inference.query(variables=["probabilidad_sismo"], evidence=evidencia)
+    resultado = consultar_probabilidad_sismo(evidencia)
     
     # Visualizar resultados
-    plt.figure(figsize=(8, 4))
+    fig = Figure(figsize=(8, 4), layout='constrained')
+    ax = fig.subplots()
     probabilidades = resultado.values
     estados = ["Baja", "Media", "Alta"]
-    plt.bar(estados, probabilidades, color=['lightgreen', 'lightcoral', 'lightblue'], edgecolor='black')
-    plt.title("Probabilidad de Sismo", fontsize=16)
-    plt.ylabel("Probabilidad", fontsize=12)
-    plt.ylim(0, 1)
-    plt.grid(True, linestyle='--', alpha=0.7)
+    ax.bar(estados, probabilidades, color=['lightgreen', 'lightcoral', 'lightblue'], edgecolor='black')
+    ax.set_title("Probabilidad de Sismo", fontsize=16)
+    ax.set_ylabel("Probabilidad", fontsize=12)
+    ax.set_ylim(0, 1)
+    ax.grid(True, linestyle='--', alpha=0.7)
     buf = io.BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close()
+    fig.savefig(buf, format='png', dpi=100)
     buf.seek(0)
     
     return Image.open(buf), str(resultado)
@@ -1,8 +1,12 @@
 from pgmpy.models import DiscreteBayesianNetwork
-from pgmpy.factors.discrete import TabularCPD
+from pgmpy.factors.discrete import TabularCPD, DiscreteFactor
 from pgmpy.inference import VariableElimination
 import logging
-from itertools import product
+from functools import lru_cache
+from fast_infer import (
+    magnitudes, profundidades, tiempos, fallas, patrones, intensidades, frecuencias,
+    full_probs_transposed, padres_probabilidad, infer
+)
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -37,63 +41,6 @@ try:
         ("frecuencia_mensual", "probabilidad_sismo")
     ])
 
-    # Función para calcular probabilidades de manera más precisa
-    def calcular_probabilidades(magnitud, profundidad, tiempo, falla, patron, intensidad, frecuencia):
-        """
-        Calcula probabilidades basadas en evidencia específica.
-        Retorna [prob_baja, prob_media, prob_alta]
-        """
-        # Base inicial de probabilidad
-        prob_base = [0.6, 0.3, 0.1]  # [baja, media, alta]
-        
-        # Factores de ajuste para cada variable
-        factores = {
-            "magnitud": {"baja": [0.1, -0.05, -0.05], "media": [0, 0, 0], "alta": [-0.2, 0, 0.2], "desconocida": [0, 0, 0]},
-            "profundidad": {"superficial": [-0.1, 0, 0.1], "intermedia": [0, 0, 0], "profunda": [0.1, 0, -0.1], "desconocida": [0, 0, 0]},
-            "tiempo": {"reciente": [-0.1, 0, 0.1], "medio": [0, 0, 0], "lejano": [0.1, 0, -0.1], "desconocido": [0, 0, 0]},
-            "falla": {"baja": [0.1, 0, -0.1], "media": [0, 0, 0], "alta": [-0.15, 0, 0.15]},
-            "patron": {"esporádico": [0.1, 0, -0.1], "regular": [0, 0, 0], "frecuente": [-0.15, 0, 0.15], "desconocido": [0, 0, 0]},
-            "intensidad": {"baja": [0.1, 0, -0.1], "media": [0, 0, 0], "alta": [-0.15, 0, 0.15], "desconocida": [0, 0, 0]},
-            "frecuencia": {"baja": [0.1, 0, -0.1], "media": [0, 0, 0], "alta": [-0.15, 0, 0.15], "desconocida": [0, 0, 0]},
-        }
-        
-        # Aplicar factores de ajuste
-        ajuste = [0, 0, 0]
-        ajuste = [x + y for x, y in zip(ajuste, factores["magnitud"][magnitud])]
-        ajuste = [x + y for x, y in zip(ajuste, factores["profundidad"][profundidad])]
-        ajuste = [x + y for x, y in zip(ajuste, factores["tiempo"][tiempo])]
-        ajuste = [x + y for x, y in zip(ajuste, factores["falla"][falla])]
-        ajuste = [x + y for x, y in zip(ajuste, factores["patron"][patron])]
-        ajuste = [x + y for x, y in zip(ajuste, factores["intensidad"][intensidad])]
-        ajuste = [x + y for x, y in zip(ajuste, factores["frecuencia"][frecuencia])]
-        
-        # Calcular probabilidades finales
-        probs = [max(0, min(1, p + a)) for p, a in zip(prob_base, ajuste)]
-        
-        # Normalizar para asegurar que sumen 1
-        suma = sum(probs)
-        probs = [p / suma for p in probs]
-        
-        return probs
-
-    # Definir estados posibles
-    magnitudes = ["baja", "media", "alta", "desconocida"]
-    profundidades = ["superficial", "intermedia", "profunda", "desconocida"]
-    tiempos = ["reciente", "medio", "lejano", "desconocido"]
-    fallas = ["baja", "media", "alta"]
-    patrones = ["esporádico", "regular", "frecuente", "desconocido"]
-    intensidades = ["baja", "media", "alta", "desconocida"]
-    frecuencias = ["baja", "media", "alta", "desconocida"]
-
-    # Generar todas las combinaciones y sus probabilidades
-    full_probs = []
-    for comb in product(magnitudes, profundidades, tiempos, fallas, patrones, intensidades, frecuencias):
-        probs = calcular_probabilidades(*comb)
-        full_probs.append(probs)
-
-    # Transponer para formato de pgmpy
-    full_probs_transposed = list(map(list, zip(*full_probs)))
-
     # CPDs para las variables
     cpd_magnitud = TabularCPD(
         variable="magnitud_historica", variable_card=4,
@@ -199,9 +146,44 @@ try:
     if not model.check_model():
         raise ValueError("El modelo no es válido")
 
-    # Inferencia
-    inference = VariableElimination(model)
+except Exception as e:
+    logger.error(f"Error en el modelo: {str(e)}")
+    raise
 
+@lru_cache(maxsize=1)
+def get_inference():
+    """
+    Devuelve el objeto de inferencia por eliminación de variables del modelo.
+    Se crea en la primera consulta y se reutiliza en las siguientes.
+    """
+    return VariableElimination(model)
+
+def consultar_probabilidad_sismo(evidencia):
+    """
+    Calcula la distribución de probabilidad_sismo dada la evidencia.
+    Si se observan todos sus padres la respuesta es una columna de la CPT,
+    que se lee con fast_infer.infer sin ejecutar la eliminación de variables.
+    Retorna un DiscreteFactor igual al de inference.query.
+    """
+    if all(evidencia.get(var) is not None for var in padres_probabilidad):
+        return DiscreteFactor(
+            ["probabilidad_sismo"], [3], infer(evidencia).copy(),
+            state_names={"probabilidad_sismo": ["baja", "media", "alta"]}
+        )
+
+    evidencia = tuple(sorted((var, val) for var, val in evidencia.items() if val is not None))
+    return _consultar_ve(evidencia).copy()
+
+@lru_cache(maxsize=4096)
+def _consultar_ve(evidencia):
+    """
+    Consulta probabilidad_sismo por eliminación de variables. evidencia es
+    una tupla ordenada de pares (variable, estado) para poder usarla como
+    clave de caché: una evidencia repetida no vuelve a ejecutar la consulta.
+    """
+    return get_inference().query(variables=["probabilidad_sismo"], evidence=dict(evidencia))
+
+if __name__ == "__main__":
     # Ejemplo de inferencia con evidencia parcial
     evidence = {
         "magnitud_historica": "alta",
@@ -213,13 +195,9 @@ try:
         "frecuencia_mensual": "alta"
     }
 
-    result = inference.query(variables=["probabilidad_sismo"], evidence=evidence)
+    result = get_inference().query(variables=["probabilidad_sismo"], evidence=evidence)
     logger.info("\nProbabilidad de sismo dado:")
     for var, val in evidence.items():
         logger.info(f"{var}: {val}")
     logger.info("\nResultado:")
     logger.info(result)
-
-except Exception as e:
-    logger.error(f"Error en el modelo: {str(e)}")
-    raise
@@ -1,8 +1,10 @@
-import pandas as pd
+import argparse
+import numpy as np
 import logging
 import os
-from data_cleaner import preprocesar_para_bayes, cargar_datos
-from model import inference
+import data_cleaner
+from data_cleaner import preprocesar_para_bayes_soa, cargar_datos, buscar_archivo_csv
+from fast_infer import consultar_probabilidad_sismo_lote
 
 # Configurar logging
 logging.basicConfig(
@@ -11,51 +13,106 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+NIVELES_PROBABILIDAD = ("bajo", "medio", "alto")
+
+RECOMENDACIONES = (
+    "NORMAL - Baja probabilidad de sismo",
+    "PRECAUCIÓN - Probabilidad media de sismo",
+    "ALERTA - Alta probabilidad de sismo",
+)
+
+def nivel_recomendacion(posteriores):
+    """
+    Devuelve el índice en RECOMENDACIONES para una distribución [baja, media,
+    alta] o para un array (N, 3) de ellas: alerta si la probabilidad alta
+    supera 0.5, precaución si la supera la media y normal en otro caso.
+    """
+    return np.select([posteriores[..., 2] > 0.5, posteriores[..., 1] > 0.5], [2, 1], default=0)
+
+# Resultado del preprocesamiento guardado entre ejecuciones
+RUTA_CACHE = os.path.join('.cache', 'evidencias.npz')
+
+def cargar_evidencias():
+    """
+    Carga y preprocesa el CSV de sismos para el modelo bayesiano.
+    Retorna un diccionario {variable: array de estados por registro}.
+    El resultado se guarda en RUTA_CACHE y se reutiliza mientras no cambien
+    el CSV (ruta, fecha de modificación y tamaño) ni data_cleaner.py.
+    """
+    ruta_csv = buscar_archivo_csv()
+    estado_csv = os.stat(ruta_csv)
+    clave = "|".join(map(str, (
+        os.path.abspath(ruta_csv), estado_csv.st_mtime_ns, estado_csv.st_size,
+        os.stat(data_cleaner.__file__).st_mtime_ns
+    )))
+
+    if os.path.exists(RUTA_CACHE):
+        try:
+            with np.load(RUTA_CACHE) as datos:
+                if datos['_clave'].item() == clave:
+                    logger.info("Usando datos preprocesados en caché: %s", RUTA_CACHE)
+                    return {col: datos[col] for col in datos.files if col != '_clave'}
+        except Exception as e:
+            logger.warning("No se pudo leer la caché %s: %s", RUTA_CACHE, e)
+
+    evidencias = preprocesar_para_bayes_soa(cargar_datos(ruta_csv))
+
+    # Escribir en un archivo temporal y reemplazar, para que dos ejecuciones
+    # simultáneas no dejen un npz a medio escribir
+    ruta_temporal = f"{RUTA_CACHE}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(RUTA_CACHE), exist_ok=True)
+        with open(ruta_temporal, 'wb') as f:
+            np.savez(f, _clave=np.array(clave), **evidencias)
+        os.replace(ruta_temporal, RUTA_CACHE)
+    except Exception as e:
+        logger.warning("No se pudo escribir la caché %s: %s", RUTA_CACHE, e)
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+    return evidencias
+
+def main(verbose=False):
+    """
+    Carga los datos, realiza la inferencia y registra la recomendación para
+    el último registro. Con verbose=True también registra sus probabilidades.
+    """
     try:
         # 1. Cargar y preprocesar
         logger.info("Cargando datos...")
-        df = cargar_datos()
-        df_bayes = preprocesar_para_bayes(df)
+        evidencias = cargar_evidencias()
         logger.info("Datos preprocesados exitosamente")
 
-        # 2. Seleccionar una evidencia (puedes cambiar el índice)
-        evidencia = df_bayes.iloc[-1].to_dict()
-        logger.info("Evidencia seleccionada:")
-        for var, val in evidencia.items():
-            logger.info(f"{var}: {val}")
-
-        # 3. Inferencia
+        # 2. Inferencia para todos los registros en un solo lote
         logger.info("Realizando inferencia...")
-        resultado = inference.query(variables=["probabilidad_sismo"], evidence=evidencia)
-        
-        # 4. Mostrar resultados
-        logger.info("\nResultados de la inferencia:")
-        logger.info(resultado)
-
-        # 5. Interpretación de resultados
-        prob_baja = resultado.values[0]
-        prob_media = resultado.values[1]
-        prob_alta = resultado.values[2]
-
-        logger.info("\nInterpretación:")
-        logger.info(f"Probabilidad de sismo bajo: {prob_baja:.2%}")
-        logger.info(f"Probabilidad de sismo medio: {prob_media:.2%}")
-        logger.info(f"Probabilidad de sismo alto: {prob_alta:.2%}")
-
-        # 6. Recomendaciones basadas en la probabilidad
-        if prob_alta > 0.5:
-            logger.info("\nRecomendación: ALERTA - Alta probabilidad de sismo")
-        elif prob_media > 0.5:
-            logger.info("\nRecomendación: PRECAUCIÓN - Probabilidad media de sismo")
-        else:
-            logger.info("\nRecomendación: NORMAL - Baja probabilidad de sismo")
+        posteriores = consultar_probabilidad_sismo_lote(evidencias)
+        logger.info("Inferencia realizada para %d registros", len(posteriores))
+
+        # 3. Seleccionar una evidencia (puedes cambiar el índice)
+        evidencia = {col: valores[-1] for col, valores in evidencias.items()}
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Evidencia seleccionada:\n%s", "\n".join(f"{var}: {val}" for var, val in evidencia.items()))
+
+        # 4. Recomendación basada en la probabilidad
+        resultado = posteriores[-1]
+        logger.info("\nRecomendación: %s", RECOMENDACIONES[nivel_recomendacion(resultado)])
+
+        # 5. Detalle de resultados (solo con --verbose)
+        if verbose:
+            logger.info("\nResultados de la inferencia:\n%s", resultado)
+            logger.info("\nInterpretación:\n%s", "\n".join(
+                f"Probabilidad de sismo {nivel}: {prob:.2%}"
+                for nivel, prob in zip(NIVELES_PROBABILIDAD, resultado)
+            ))
 
     except FileNotFoundError as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         logger.info("Por favor, asegúrate de que el archivo CSV esté en el directorio del proyecto.")
     except Exception as e:
-        logger.error(f"Error durante la ejecución: {str(e)}")
+        logger.error("Error durante la ejecución: %s", e)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Predicción de probabilidad de sismo con la red bayesiana.")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="muestra las probabilidades de la inferencia además de la recomendación")
+    args = parser.parse_args()
+    main(verbose=args.verbose)
\ No newline at end of file